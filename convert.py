@@ -1,59 +1,14 @@
 import os
 from os import path, mkdir
-import xml.etree.ElementTree as ET
+from lxml import etree as ET
 import re
-import uuid
 import csv
+import itertools
 import json
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
-if not path.exists("output"):
-    mkdir("output")
-
-# Find directory starting with "SSRQ" and containing a "data" subfolder
-dir = None
-current_dir = os.getcwd()
-for item in os.listdir(current_dir):
-    if item.startswith("SSRQ") and os.path.isdir(item):
-        potential_data_path = os.path.join(current_dir, item, "data")
-        if os.path.isdir(potential_data_path):
-            dir = potential_data_path
-            break
-
-if not dir:
-    raise FileNotFoundError(
-        "Could not find a directory starting with 'SSRQ' containing a 'data' subfolder"
-    )
-
-# Find all subdirectories
-subdirs = []
-for item in os.listdir(dir):
-    item_path = os.path.join(dir, item)
-    if os.path.isdir(item_path):
-        subdirs.append(item_path)
-
-# Dictionary to store XML files for each subdirectory
-xml_files_by_subdir = {}
-
-# Loop through each subdirectory
-for subdir_path in subdirs:
-    subdir_name = os.path.basename(subdir_path)
-    xml_files_by_subdir[subdir_name] = []
-
-    # Look for folders within this subdirectory
-    for inner_folder in os.listdir(subdir_path):
-        inner_folder_path = os.path.join(subdir_path, inner_folder)
-        if os.path.isdir(inner_folder_path):
-            # Look for XML files in inner folders
-            for file in os.listdir(inner_folder_path):
-                if "-lit" in file or "-intro" in file:
-                    continue
-                if file.endswith(".xml"):
-                    xml_files_by_subdir[subdir_name].append(
-                        os.path.join(inner_folder_path, file)
-                    )
-
-# Register namespaces for ElementTree
+# Register namespaces for lxml
 namespaces = {
     "tei": "http://www.tei-c.org/ns/1.0",
     "xsi": "http://www.w3.org/2001/XMLSchema-instance",
@@ -63,36 +18,95 @@ namespaces = {
 for prefix, uri in namespaces.items():
     ET.register_namespace(prefix, uri)
 
+# XPath expressions shared by every document, compiled once
+_XP_TITLE = ET.XPath(".//tei:titleStmt/tei:title", namespaces=namespaces)
+_XP_EDITORS = ET.XPath(
+    ".//tei:titleStmt/tei:editor/tei:persName", namespaces=namespaces
+)
+_XP_PUBLICATION_DATES = ET.XPath(
+    ".//tei:publicationStmt/tei:date", namespaces=namespaces
+)
+_XP_REPOSITORIES = ET.XPath(".//tei:msIdentifier/tei:repository", namespaces=namespaces)
+_XP_IDNOS = ET.XPath(".//tei:msIdentifier/tei:idno", namespaces=namespaces)
+_XP_ORIG_DATE = ET.XPath(".//tei:origin/tei:origDate", namespaces=namespaces)
+
+_WS_RE = re.compile(r"\s+")
+# Single whitespace characters, e.g. newlines from <lb/>, are kept as they are
+_MULTI_WS_RE = re.compile(r"\s{2,}")
+# Tokens are the non-empty runs between token delimiters
+_TOKEN_RE = re.compile(r"[^', ]+")
+# Literature and introduction files are not part of the corpus
+_SKIPPED_FILE_RE = re.compile(r"-(?:lit|intro)")
+
+# Write buffer of the CSV output files, large enough to coalesce many rows
+_CSV_BUFFER_SIZE = 1 << 20
+
+# Parser settings shared by every file. IDs are never looked up, and comments
+# and processing instructions are dropped, as ElementTree did.
+_PARSER_OPTIONS = {
+    "huge_tree": True,
+    "collect_ids": False,
+    "remove_blank_text": False,
+    "remove_comments": True,
+    "remove_pis": True,
+}
 
-def process_corpus(xml_files_by_subdir):
-    """Process all XML files in the corpus."""
-    corpus_data = {}
-
-    for subdir_name, file_paths in xml_files_by_subdir.items():
-        subdir_data = []
+# Clark notation tags, compared directly against element.tag
+TEI = "{%s}" % namespaces["tei"]
+TEI_HEADER = TEI + "teiHeader"
+BODY = TEI + "body"
+PB = TEI + "pb"
+LB = TEI + "lb"
+CHOICE = TEI + "choice"
+NOTE = TEI + "note"
+SUBST = TEI + "subst"
+DEL = TEI + "del"
+
+# Elements annotated with their attributes, i.e. the annotation types of
+# convert_to_lcp other than choice and substitution, mapped to their type
+ANNOTATED_ELEMENTS = {
+    TEI + name: name for name in ("placeName", "persName", "origDate", "date")
+}
 
-        for file_path in file_paths:
-            try:
-                doc_data = extract_document_data(file_path)
-                subdir_data.append(doc_data)
-            except Exception as e:
-                print(f"Error processing {file_path}: {str(e)}")
 
-        corpus_data[subdir_name] = subdir_data
+def process_corpus(xml_files_by_subdir):
+    """Process all XML files in the corpus, one worker process per CPU."""
+    corpus_data = {subdir_name: [] for subdir_name in xml_files_by_subdir}
+
+    # Files are independent, so they are parsed in parallel and regrouped
+    jobs = [
+        (subdir_name, file_path)
+        for subdir_name, file_paths in xml_files_by_subdir.items()
+        for file_path in file_paths
+    ]
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        results = executor.map(
+            extract_document_data_safe,
+            [file_path for _, file_path in jobs],
+            chunksize=32,
+        )
+        for (subdir_name, _), doc_data in zip(jobs, results):
+            if doc_data is not None:
+                corpus_data[subdir_name].append(doc_data)
 
     return corpus_data
 
 
-def extract_document_data(file_path):
-    """Extract data from a single XML document."""
-    tree = ET.parse(file_path)
-    root = tree.getroot()
+def extract_document_data_safe(file_path):
+    """Extract data from a single XML document, reporting errors instead of raising."""
+    try:
+        return extract_document_data(file_path)
+    except Exception as e:
+        print(f"Error processing {file_path}: {str(e)}")
+        return None
 
-    # Extract document metadata
-    metadata = extract_metadata(root)
+
+def extract_document_data(file_path):
+    """Extract data from a single XML document in one streaming pass."""
+    metadata = None
 
     # Initialize text extraction data structures
-    text_content = []  # Store final text directly, character by character
+    text_content = []  # Store final text directly, chunk by chunk
     annotations = []
     pages = []
     current_page = None
@@ -106,10 +120,67 @@ def extract_document_data(file_path):
         "last_char_is_whitespace": True,  # Track whitespace to avoid duplicates
     }
 
-    # Process text content
-    body = root.find(".//tei:body", namespaces)
-    if body is not None:
-        process_element(body, context)
+    # Start offset of every open element inside <body>
+    open_elements = []
+    # Number of open annotated elements, whose subtrees are kept for their text
+    annotated_depth = 0
+    # Depth inside an element whose children are handled at its end event
+    skip_depth = 0
+    # Text and tail are only guaranteed to be parsed at the following event,
+    # so they are emitted lazily: (element, is_tail)
+    pending = None
+
+    events = ET.iterparse(file_path, events=("start", "end"), **_PARSER_OPTIONS)
+    for event, element in events:
+        if pending is not None:
+            pending_element, is_tail = pending
+            pending = None
+            if is_tail:
+                add_text_to_context(pending_element.tail, context)
+                # Free the finished element and its already processed siblings
+                if not annotated_depth:
+                    pending_element.clear()
+                    while pending_element.getprevious() is not None:
+                        del pending_element.getparent()[0]
+            else:
+                add_text_to_context(pending_element.text, context)
+
+        if skip_depth:
+            skip_depth += 1 if event == "start" else -1
+            if skip_depth:
+                continue
+
+        tag = element.tag
+
+        if event == "start":
+            if not open_elements and tag != BODY:
+                continue
+            open_elements.append(context["global_offset"])
+            if tag in ANNOTATED_ELEMENTS:
+                annotated_depth += 1
+            if tag in HANDLERS:
+                skip_depth = 1
+            else:
+                pending = (element, False)
+            continue
+
+        if not open_elements:
+            if tag == TEI_HEADER and metadata is None:
+                metadata = extract_metadata(element)
+                element.clear()
+            continue
+
+        start_offset = open_elements.pop()
+        process_element(element, context, start_offset)
+        if tag in ANNOTATED_ELEMENTS:
+            annotated_depth -= 1
+        if not open_elements:
+            # Only the first <body> is processed
+            break
+        pending = (element, True)
+
+    if metadata is None:
+        metadata = extract_metadata(events.root)
 
     # Join text content into a single string
     text_content = "".join(context["text_content"])
@@ -128,196 +199,183 @@ def extract_metadata(root):
     metadata = {}
 
     # Extract title
-    title_elem = root.find(".//tei:titleStmt/tei:title", namespaces)
-    if title_elem is not None and title_elem.text:
-        metadata["title"] = title_elem.text.strip()
+    titles = _XP_TITLE(root)
+    if titles and titles[0].text:
+        metadata["title"] = titles[0].text.strip()
 
     # Extract editors
     editors = []
-    for editor in root.findall(".//tei:titleStmt/tei:editor/tei:persName", namespaces):
+    for editor in _XP_EDITORS(root):
         if editor.text:
             editors.append(editor.text.strip())
     metadata["editors"] = editors
 
     # Extract dates
-    for date in root.findall(".//tei:publicationStmt/tei:date", namespaces):
+    for date in _XP_PUBLICATION_DATES(root):
         date_type = date.get("type")
         date_when = date.get("when")
         if date_type and date_when:
             metadata[f"date_{date_type}"] = date_when
 
     # Extract repository information
-    for repo in root.findall(".//tei:msIdentifier/tei:repository", namespaces):
+    for repo in _XP_REPOSITORIES(root):
         lang = repo.get("{http://www.tei-c.org/ns/1.0}lang")
         if repo.text and lang:
             metadata[f"repository_{lang}"] = repo.text.strip()
 
     # Extract IDs
-    for idno in root.findall(".//tei:msIdentifier/tei:idno", namespaces):
+    for idno in _XP_IDNOS(root):
         lang = idno.get("{http://www.tei-c.org/ns/1.0}lang")
         if idno.text:
             metadata[f"idno_{lang}"] = idno.text.strip()
 
     # Extract origination date
-    orig_date = root.find(".//tei:origin/tei:origDate", namespaces)
-    if orig_date is not None:
-        metadata["origDate_when"] = orig_date.get("when", "")
-        metadata["origDate_text"] = get_element_text(orig_date)
+    orig_dates = _XP_ORIG_DATE(root)
+    if orig_dates:
+        metadata["origDate_when"] = orig_dates[0].get("when", "")
+        metadata["origDate_text"] = get_element_text(orig_dates[0])
 
     return metadata
 
 
-def process_element(element, context):
-    """Process an XML element and its children recursively."""
-    element_name = element.tag.split("}")[-1]
-    start_offset = context["global_offset"]
+def process_element(element, context, start_offset):
+    """Process an XML element at its end event, once its subtree is parsed."""
+    tag = element.tag
 
     # Handle specific element types
-    if element_name == "pb":
-        page_num = element.get("n")
-        if page_num:
-            context["current_page"] = page_num
-            context["pages"].append(
-                {"page_num": page_num, "offset": context["global_offset"]}
-            )
-
-    elif element_name == "lb":
-        # Always add a newline character for line breaks, regardless of previous whitespace
-        context["text_content"].append("\n")
-        context["global_offset"] += 1
-        context["last_char_is_whitespace"] = (
-            True  # Mark as whitespace for future processing
-        )
-
-    elif element_name == "choice":
-        # Handle choice between abbreviated and expanded forms
-        abbr = element.find(".//tei:abbr", namespaces)
-        expan = element.find(".//tei:expan", namespaces)
-
-        abbr_text = get_element_text(abbr) if abbr is not None else None
-        expan_text = get_element_text(expan) if expan is not None else None
-
-        # Use expanded text in the main content if available, otherwise use abbreviated
-        chosen_text = expan_text if expan_text else abbr_text
-        alternative_text = abbr_text if chosen_text == expan_text else expan_text
+    handler = HANDLERS.get(tag)
+    if handler is not None:
+        handler(element, context, start_offset)
+        return context["global_offset"]
 
-        if chosen_text:
-            add_text_to_context(chosen_text, context)
+    # Only annotate the elements that are converted to LCP layers
+    ann_type = ANNOTATED_ELEMENTS.get(tag)
+    if ann_type and element.attrib:
+        # Extract the text content of this element
+        element_text = get_element_text(element)
 
-        # Add as annotation
         context["annotations"].append(
             {
-                "type": "choice",
-                "text": chosen_text,
-                "alternative_text": alternative_text,
+                "type": ann_type,
+                "attributes": dict(element.attrib),
+                "text": element_text,
+                "alternative_text": None,
                 "start_offset": start_offset,
                 "end_offset": context["global_offset"],
                 "page": context["current_page"],
             }
         )
 
-        # Skip processing children as we've handled them here
-        return context["global_offset"]
-
-    elif element_name == "note":
-        # Add space before note in text if needed
-        if not context["last_char_is_whitespace"]:
-            context["text_content"].append(" ")
-            context["global_offset"] += 1
-            context["last_char_is_whitespace"] = True
+    return context["global_offset"]
 
-        note_text = get_element_text(element)
-        note_start = context["global_offset"]
 
-        # Add as annotation
-        context["annotations"].append(
-            {
-                "type": "note",
-                "text": note_text,
-                "alternative_text": None,
-                "start_offset": note_start,
-                "end_offset": note_start + len(note_text),
-                "page": context["current_page"],
-            }
+def _handle_pb(element, context, start_offset):
+    """Record the page that starts at a page break."""
+    page_num = element.get("n")
+    if page_num:
+        context["current_page"] = page_num
+        context["pages"].append(
+            {"page_num": page_num, "offset": context["global_offset"]}
         )
 
-        return context["global_offset"]
 
-    elif element_name == "subst":
-        # Handle substitution (deleted and added text)
-        del_elem = element.find(".//tei:del", namespaces)
-        add_elem = element.find(".//tei:add", namespaces)
+def _handle_lb(element, context, start_offset):
+    """Add a newline for a line break."""
+    # Always add a newline character for line breaks, regardless of previous whitespace
+    context["text_content"].append("\n")
+    context["global_offset"] += 1
+    context["last_char_is_whitespace"] = (
+        True  # Mark as whitespace for future processing
+    )
 
-        del_text = get_element_text(del_elem) if del_elem is not None else None
-        add_text = get_element_text(add_elem) if add_elem is not None else None
 
-        # Only add the replacement text to the main content
-        if add_text:
-            add_text_to_context(add_text, context)
+def _handle_choice(element, context, start_offset):
+    """Handle choice between abbreviated and expanded forms."""
+    abbr = element.find(".//tei:abbr", namespaces)
+    expan = element.find(".//tei:expan", namespaces)
 
-        # Add as annotation
-        context["annotations"].append(
-            {
-                "type": "substitution",
-                "text": add_text,
-                "alternative_text": del_text,  # Store deleted text as alternative
-                "start_offset": start_offset,
-                "end_offset": context["global_offset"],
-                "page": context["current_page"],
-                "details": {"deleted": del_text, "added": add_text},
-            }
-        )
+    abbr_text = get_element_text(abbr) if abbr is not None else None
+    expan_text = get_element_text(expan) if expan is not None else None
 
-        # Skip processing children as we've handled them here
-        return context["global_offset"]
+    # Use expanded text in the main content if available, otherwise use abbreviated
+    chosen_text = expan_text if expan_text else abbr_text
+    alternative_text = abbr_text if chosen_text == expan_text else expan_text
 
-    else:
-        # Normal element processing
-        if element.text:
-            add_text_to_context(element.text, context)
-
-        # Process children
-        for child in element:
-            process_element(child, context)
-
-            # Add tail text after processing the child
-            if child.tail:
-                add_text_to_context(child.tail, context)
-
-    # Check if this is an annotation element (not structural elements)
-    if element_name not in [
-        "div",
-        "p",
-        "body",
-        "text",
-        "group",
-        "lb",
-        "pb",
-        "choice",
-        "subst",
-        "del",
-        "add",
-        "abbr",
-        "expan",
-    ]:
-        # Don't annotate purely structural elements
-        if element.attrib:
-            # Extract the text content of this element
-            element_text = get_element_text(element)
-
-            context["annotations"].append(
-                {
-                    "type": element_name,
-                    "attributes": dict(element.attrib),
-                    "text": element_text,
-                    "alternative_text": None,
-                    "start_offset": start_offset,
-                    "end_offset": context["global_offset"],
-                    "page": context["current_page"],
-                }
-            )
+    if chosen_text:
+        add_text_to_context(chosen_text, context)
 
-    return context["global_offset"]
+    # Add as annotation
+    context["annotations"].append(
+        {
+            "type": "choice",
+            "text": chosen_text,
+            "alternative_text": alternative_text,
+            "start_offset": start_offset,
+            "end_offset": context["global_offset"],
+            "page": context["current_page"],
+        }
+    )
+
+
+def _handle_note(element, context, start_offset):
+    """Annotate a note without adding its text to the main content."""
+    # Add space before note in text if needed
+    if not context["last_char_is_whitespace"]:
+        context["text_content"].append(" ")
+        context["global_offset"] += 1
+        context["last_char_is_whitespace"] = True
+
+    note_text = get_element_text(element)
+    note_start = context["global_offset"]
+
+    # Add as annotation
+    context["annotations"].append(
+        {
+            "type": "note",
+            "text": note_text,
+            "alternative_text": None,
+            "start_offset": note_start,
+            "end_offset": note_start + len(note_text),
+            "page": context["current_page"],
+        }
+    )
+
+
+def _handle_subst(element, context, start_offset):
+    """Handle substitution (deleted and added text)."""
+    del_elem = element.find(".//tei:del", namespaces)
+    add_elem = element.find(".//tei:add", namespaces)
+
+    del_text = get_element_text(del_elem) if del_elem is not None else None
+    add_text = get_element_text(add_elem) if add_elem is not None else None
+
+    # Only add the replacement text to the main content
+    if add_text:
+        add_text_to_context(add_text, context)
+
+    # Add as annotation
+    context["annotations"].append(
+        {
+            "type": "substitution",
+            "text": add_text,
+            "alternative_text": del_text,  # Store deleted text as alternative
+            "start_offset": start_offset,
+            "end_offset": context["global_offset"],
+            "page": context["current_page"],
+            "details": {"deleted": del_text, "added": add_text},
+        }
+    )
+
+
+# Handlers of the elements whose children are not streamed but read from
+# their subtree at the end event
+HANDLERS = {
+    PB: _handle_pb,
+    LB: _handle_lb,
+    CHOICE: _handle_choice,
+    NOTE: _handle_note,
+    SUBST: _handle_subst,
+}
 
 
 def add_text_to_context(text, context):
@@ -326,20 +384,17 @@ def add_text_to_context(text, context):
         return
 
     # Clean text - collapse multiple spaces into one
-    text = re.sub(r"\s+", " ", text)
-
-    # Handle consecutive whitespace
-    for char in text:
-        if char.isspace():
-            # Only add whitespace if previous character wasn't whitespace
-            if not context["last_char_is_whitespace"]:
-                context["text_content"].append(char)
-                context["global_offset"] += 1
-                context["last_char_is_whitespace"] = True
-        else:
-            context["text_content"].append(char)
-            context["global_offset"] += 1
-            context["last_char_is_whitespace"] = False
+    text = _WS_RE.sub(" ", text)
+
+    # Only add leading whitespace if previous character wasn't whitespace
+    if context["last_char_is_whitespace"] and text.startswith(" "):
+        text = text[1:]
+        if not text:
+            return
+
+    context["text_content"].append(text)
+    context["global_offset"] += len(text)
+    context["last_char_is_whitespace"] = text.endswith(" ")
 
 
 def get_element_text(element):
@@ -354,28 +409,39 @@ def get_element_text(element):
         text_parts.append(element.text)
 
     for child in element:
-        if child.tag.split("}")[-1] not in ["del"]:  # Skip deleted text
+        if child.tag != DEL:  # Skip deleted text
+            # Nested text is normalized level by level, as it always was
             text_parts.append(get_element_text(child))
         if child.tail:
             text_parts.append(child.tail)
 
     # Join all text parts and normalize whitespace
-    text = "".join(filter(None, text_parts))
-    return remove_extra_spaces(text)
+    return remove_extra_spaces("".join(text_parts))
 
 
 def remove_extra_spaces(text):
     """Remove extra spaces from the text."""
-    return re.sub(r"\s{2,}", " ", text.strip())
+    return _MULTI_WS_RE.sub(" ", text.strip())
 
 
-### Example usage ###
-a_file = extract_document_data(
-    "SSRQ-SDS-FDS-editio-data-9247386/data/FR/FR_I_2_8/SSRQ-FR-I_2_8-208.17-1.xml"
-)
 ### Need to check ranges on annotations ###
 
 
+def iter_uuid4(batch_size=4096):
+    """
+    Yield random version 4 UUID strings.
+
+    Random bytes are read in batches instead of one os.urandom call per UUID.
+    """
+    while True:
+        random_hex = os.urandom(16 * batch_size).hex()
+        for i in range(0, len(random_hex), 32):
+            h = random_hex[i : i + 32]
+            # Set the version (4) and variant (10xx) bits
+            variant = "89ab"[int(h[16], 16) & 3]
+            yield f"{h[:8]}-{h[8:12]}-4{h[13:16]}-{variant}{h[17:20]}-{h[20:]}"
+
+
 def convert_to_lcp(corpus_data, output_dir="output"):
     """
     Convert the extracted TEI documents to LCP format.
@@ -418,15 +484,35 @@ def convert_to_lcp(corpus_data, output_dir="output"):
 
     # Open all required files
     with open(
-        os.path.join(output_dir, "document.csv"), "w", newline="", encoding="utf-8"
+        os.path.join(output_dir, "document.csv"),
+        "w",
+        newline="",
+        encoding="utf-8",
+        buffering=_CSV_BUFFER_SIZE,
     ) as doc_file, open(
-        os.path.join(output_dir, "segment.csv"), "w", newline="", encoding="utf-8"
+        os.path.join(output_dir, "segment.csv"),
+        "w",
+        newline="",
+        encoding="utf-8",
+        buffering=_CSV_BUFFER_SIZE,
     ) as seg_file, open(
-        os.path.join(output_dir, "token.csv"), "w", newline="", encoding="utf-8"
+        os.path.join(output_dir, "token.csv"),
+        "w",
+        newline="",
+        encoding="utf-8",
+        buffering=_CSV_BUFFER_SIZE,
     ) as tok_file, open(
-        os.path.join(output_dir, "token_form.csv"), "w", newline="", encoding="utf-8"
+        os.path.join(output_dir, "token_form.csv"),
+        "w",
+        newline="",
+        encoding="utf-8",
+        buffering=_CSV_BUFFER_SIZE,
     ) as form_file, open(
-        os.path.join(output_dir, "token_lemma.csv"), "w", newline="", encoding="utf-8"
+        os.path.join(output_dir, "token_lemma.csv"),
+        "w",
+        newline="",
+        encoding="utf-8",
+        buffering=_CSV_BUFFER_SIZE,
     ) as lemma_file:
 
         # Initialize writers with headers
@@ -468,6 +554,7 @@ def convert_to_lcp(corpus_data, output_dir="output"):
                 "w",
                 newline="",
                 encoding="utf-8",
+                buffering=_CSV_BUFFER_SIZE,
             )
             annotation_writers[ann_type] = csv.writer(annotation_files[ann_type])
 
@@ -502,6 +589,7 @@ def convert_to_lcp(corpus_data, output_dir="output"):
                 "w",
                 newline="",
                 encoding="utf-8",
+                buffering=_CSV_BUFFER_SIZE,
             ),
             # "term_ref": open(
             #     os.path.join(output_dir, "term_ref.csv"),
@@ -514,6 +602,7 @@ def convert_to_lcp(corpus_data, output_dir="output"):
                 "w",
                 newline="",
                 encoding="utf-8",
+                buffering=_CSV_BUFFER_SIZE,
             ),
             # "note_text": open(
             #     os.path.join(output_dir, "note_text.csv"),
@@ -526,12 +615,14 @@ def convert_to_lcp(corpus_data, output_dir="output"):
                 "w",
                 newline="",
                 encoding="utf-8",
+                buffering=_CSV_BUFFER_SIZE,
             ),
             "substitution_alternative": open(
                 os.path.join(output_dir, "substitution_alternative.csv"),
                 "w",
                 newline="",
                 encoding="utf-8",
+                buffering=_CSV_BUFFER_SIZE,
             ),
         }
 
@@ -549,6 +640,8 @@ def convert_to_lcp(corpus_data, output_dir="output"):
         token_id = 1
         document_id = 1
         form_dict = {}  # Track unique forms
+        next_form_id = itertools.count(1).__next__
+        next_segment_id = iter_uuid4().__next__
         annotation_counters = {ann_type: 1 for ann_type in annotation_types}
 
         # Process all documents
@@ -559,6 +652,13 @@ def convert_to_lcp(corpus_data, output_dir="output"):
                 metadata = doc_data["metadata"]
                 annotations = doc_data.get("annotations", [])
 
+                # Rows of this document, written in batches. Segment and token
+                # values never need escaping, so their CSV lines are formatted
+                # directly, quoting the char range as csv.writer would.
+                seg_lines = []
+                tok_lines = []
+                form_rows = []
+
                 # Process segments (split by newline)
                 segments = text.split("\n")
                 for segment in segments:
@@ -567,48 +667,48 @@ def convert_to_lcp(corpus_data, output_dir="output"):
                         continue
 
                     # Generate segment UUID as required by LCP
-                    seg_id = str(uuid.uuid4())
+                    seg_id = next_segment_id()
                     seg_start = char_offset
 
                     # Process tokens using token delimiters
-                    token_delimiters = r"[', ]"
-                    tokens = [t for t in re.split(token_delimiters, segment) if t]
+                    tokens = _TOKEN_RE.findall(segment)
 
                     for token in tokens:
                         # Get or create form ID
-                        form_id = form_dict.get(token, len(form_dict) + 1)
-                        if token not in form_dict:
+                        form_id = form_dict.get(token)
+                        if form_id is None:
+                            form_id = next_form_id()
                             form_dict[token] = form_id
                             # Write to lookup tables
-                            form_csv.writerow([form_id, token])
-                            lemma_csv.writerow([form_id, token])
-
-                        # Write token with character range
-                        token_range = f"[{char_offset},{char_offset + len(token)})"
-                        tok_csv.writerow(
-                            [
-                                token_id,
-                                form_id,
-                                form_id,  # Same ID for lemma
-                                token_range,
-                                seg_id,
-                            ]
+                            form_rows.append((form_id, token))
+
+                        # Write token with character range, same ID for lemma
+                        token_end = char_offset + len(token)
+                        tok_lines.append(
+                            f"{token_id},{form_id},{form_id},"
+                            f'"[{char_offset},{token_end})",{seg_id}\r\n'
                         )
 
                         # Update counters
-                        char_offset += len(token) + 1  # +1 for space between tokens
+                        char_offset = token_end + 1  # +1 for space between tokens
                         token_id += 1
 
                     # Adjust segment end offset (remove trailing space)
                     seg_end = char_offset - 1
 
                     # Write segment
-                    seg_csv.writerow([seg_id, f"[{seg_start},{seg_end})"])
+                    seg_lines.append(f'{seg_id},"[{seg_start},{seg_end})"\r\n')
 
                     # Add a newline character after segment
                     char_offset += 1
 
+                seg_file.writelines(seg_lines)
+                tok_file.writelines(tok_lines)
+                form_csv.writerows(form_rows)
+                lemma_csv.writerows(form_rows)  # Lemmas are the forms
+
                 # Process annotations for this document
+                text_without_newlines = None  # Computed once, when first needed
                 for annotation in annotations:
                     ann_type = annotation["type"]
 
@@ -623,8 +723,10 @@ def convert_to_lcp(corpus_data, output_dir="output"):
                     if not check_cond:
                         # sometimes the text in the file is not the same as
                         # the annotation text because of the newline character
+                        if text_without_newlines is None:
+                            text_without_newlines = text.replace("\n", "")
                         check_cond = (
-                            text.replace("\n", "")[start_offset:end_offset]
+                            text_without_newlines[start_offset:end_offset]
                             == annotation_text
                         )
                         if not check_cond:
@@ -639,7 +741,6 @@ def convert_to_lcp(corpus_data, output_dir="output"):
 
                     if ann_type == "placeName":
                         full_ref = annotation.get("attributes", {}).get("ref", "")
-                        text = annotation.get("text", "")
 
                         # Extract base name (part before the first period)
                         base_ref = (
@@ -655,7 +756,7 @@ def convert_to_lcp(corpus_data, output_dir="output"):
                             ref_id = len(attribute_lookups["placeName_ref"]) + 1
                             attribute_lookups["placeName_ref"][base_ref] = (
                                 ref_id,
-                                text,
+                                annotation_text,
                             )  # Store both ID and text
 
                         annotation_writers[ann_type].writerow(
@@ -670,10 +771,8 @@ def convert_to_lcp(corpus_data, output_dir="output"):
 
                     elif ann_type == "choice":
                         alt_text = annotation.get("alternative_text", "")
-                        alt_id = attribute_lookups["choice_alternative"].get(
-                            alt_text, len(attribute_lookups["choice_alternative"]) + 1
-                        )
-                        attribute_lookups["choice_alternative"][alt_text] = alt_id
+                        lookup = attribute_lookups["choice_alternative"]
+                        alt_id = lookup.setdefault(alt_text, len(lookup) + 1)
                         annotation_writers[ann_type].writerow(
                             [ann_id, char_range, alt_id]
                         )
@@ -696,7 +795,6 @@ def convert_to_lcp(corpus_data, output_dir="output"):
 
                     elif ann_type == "persName":
                         full_ref = annotation.get("attributes", {}).get("ref", "")
-                        text = annotation.get("text", "")
 
                         # Extract base name (part before the first period)
                         base_ref = (
@@ -707,7 +805,10 @@ def convert_to_lcp(corpus_data, output_dir="output"):
                             ref_id = attribute_lookups["persName_ref"][base_ref][0]
                         else:
                             ref_id = len(attribute_lookups["persName_ref"]) + 1
-                            attribute_lookups["persName_ref"][base_ref] = (ref_id, text)
+                            attribute_lookups["persName_ref"][base_ref] = (
+                                ref_id,
+                                annotation_text,
+                            )
 
                         annotation_writers[ann_type].writerow(
                             [ann_id, char_range, ref_id]
@@ -715,11 +816,8 @@ def convert_to_lcp(corpus_data, output_dir="output"):
 
                     elif ann_type == "substitution":
                         alt_text = annotation.get("alternative_text", "")
-                        alt_id = attribute_lookups["substitution_alternative"].get(
-                            alt_text,
-                            len(attribute_lookups["substitution_alternative"]) + 1,
-                        )
-                        attribute_lookups["substitution_alternative"][alt_text] = alt_id
+                        lookup = attribute_lookups["substitution_alternative"]
+                        alt_id = lookup.setdefault(alt_text, len(lookup) + 1)
                         annotation_writers[ann_type].writerow(
                             [ann_id, char_range, alt_id]
                         )
@@ -802,7 +900,7 @@ def convert_to_lcp(corpus_data, output_dir="output"):
                     "orig_date": {"type": "text", "nullable": True},
                     "canton": {
                         "type": "categorical",
-                        "values": list(xml_files_by_subdir.keys()),
+                        "values": list(corpus_data.keys()),
                         "nullable": True,
                     },
                 },
@@ -883,5 +981,58 @@ def convert_to_lcp(corpus_data, output_dir="output"):
     }
 
 
-corpus = process_corpus(xml_files_by_subdir)
-lcp_corpus = convert_to_lcp(corpus)
+def main():
+    """Find the SSRQ corpus files and convert them to LCP format."""
+    if not path.exists("output"):
+        mkdir("output")
+
+    # Find directory starting with "SSRQ" and containing a "data" subfolder
+    dir = None
+    current_dir = os.getcwd()
+    with os.scandir(current_dir) as entries:
+        for entry in entries:
+            if entry.name.startswith("SSRQ") and entry.is_dir():
+                potential_data_path = os.path.join(entry.path, "data")
+                if os.path.isdir(potential_data_path):
+                    dir = potential_data_path
+                    break
+
+    if not dir:
+        raise FileNotFoundError(
+            "Could not find a directory starting with 'SSRQ' containing a 'data' subfolder"
+        )
+
+    # Find all subdirectories
+    subdirs = []
+    with os.scandir(dir) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                subdirs.append(entry.path)
+
+    # Dictionary to store XML files for each subdirectory
+    xml_files_by_subdir = {}
+
+    # Loop through each subdirectory
+    for subdir_path in subdirs:
+        subdir_name = os.path.basename(subdir_path)
+        xml_files_by_subdir[subdir_name] = []
+
+        # Look for folders within this subdirectory
+        with os.scandir(subdir_path) as inner_folders:
+            for inner_folder in inner_folders:
+                if not inner_folder.is_dir():
+                    continue
+                # Look for XML files in inner folders
+                with os.scandir(inner_folder.path) as files:
+                    for file in files:
+                        if _SKIPPED_FILE_RE.search(file.name):
+                            continue
+                        if file.name.endswith(".xml"):
+                            xml_files_by_subdir[subdir_name].append(file.path)
+
+    corpus = process_corpus(xml_files_by_subdir)
+    lcp_corpus = convert_to_lcp(corpus)
+
+
+if __name__ == "__main__":
+    main()
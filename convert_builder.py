@@ -1,64 +1,29 @@
 import os
 from os import path, mkdir
-import xml.etree.ElementTree as ET
+from lxml import etree as ET
 from lcpcli.builder import Corpus
 import nltk
 import os
 import shutil
 import re
 from tqdm import tqdm
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from collections import deque
+from contextlib import closing
 import json
 from datetime import datetime
 
 ### Check NE XMLs
 
-if not path.exists("output"):
-    mkdir("output")
-
-# Find directory starting with "SSRQ" and containing a "data" subfolder
-dir = None
-current_dir = os.getcwd()
-for item in os.listdir(current_dir):
-    if item.startswith("SSRQ") and os.path.isdir(item):
-        potential_data_path = os.path.join(current_dir, item, "data")
-        if os.path.isdir(potential_data_path):
-            dir = potential_data_path
-            break
-
-if not dir:
-    raise FileNotFoundError(
-        "Could not find a directory starting with 'SSRQ' containing a 'data' subfolder"
-    )
 
-# Find all subdirectories
-subdirs = []
-for item in os.listdir(dir):
-    item_path = os.path.join(dir, item)
-    if os.path.isdir(item_path):
-        subdirs.append(item_path)
-
-# Dictionary to store XML files for each subdirectory
-xml_files_by_subdir = {}
-
-# Loop through each subdirectory
-for subdir_path in subdirs:
-    subdir_name = os.path.basename(subdir_path)
-    xml_files_by_subdir[subdir_name] = []
-
-    # Look for folders within this subdirectory
-    for inner_folder in os.listdir(subdir_path):
-        inner_folder_path = os.path.join(subdir_path, inner_folder)
-        if os.path.isdir(inner_folder_path):
-            # Look for XML files in inner folders
-            for file in os.listdir(inner_folder_path):
-                if "-lit" in file or "-intro" in file:
-                    continue
-                if file.endswith(".xml"):
-                    xml_files_by_subdir[subdir_name].append(
-                        os.path.join(inner_folder_path, file)
-                    )
+def iter_subdirs(root):
+    """Yield the directory entries directly inside root."""
+    with os.scandir(root) as it:
+        yield from (entry for entry in it if entry.is_dir())
+
 
-# Register namespaces for ElementTree
+# Register namespaces for lxml
 namespaces = {
     "tei": "http://www.tei-c.org/ns/1.0",
     "xsi": "http://www.w3.org/2001/XMLSchema-instance",
@@ -68,40 +33,113 @@ namespaces = {
 for prefix, uri in namespaces.items():
     ET.register_namespace(prefix, uri)
 
+_WS_RE = re.compile(r"\s+")
+
+# Words are runs of word characters, every other non-space character is a token
+_WORD_RE = re.compile(r"\w+|[^\w\s]")
+
+# Use NLTK's English Treebank word tokenizer instead of _WORD_RE
+USE_NLTK_WORD_TOKENIZER = False
+
+# Clark notation tags, matched directly instead of through ElementPath
+TEI_NS = "{http://www.tei-c.org/ns/1.0}"
+HEADER_TAG = f"{TEI_NS}teiHeader"
+BODY_TAG = f"{TEI_NS}body"
+TITLE_STMT_TAG = f"{TEI_NS}titleStmt"
+TITLE_TAG = f"{TEI_NS}title"
+EDITOR_TAG = f"{TEI_NS}editor"
+PERS_NAME_TAG = f"{TEI_NS}persName"
+PUBLICATION_STMT_TAG = f"{TEI_NS}publicationStmt"
+DATE_TAG = f"{TEI_NS}date"
+MS_IDENTIFIER_TAG = f"{TEI_NS}msIdentifier"
+REPOSITORY_TAG = f"{TEI_NS}repository"
+ORIGIN_TAG = f"{TEI_NS}origin"
+ORIG_DATE_TAG = f"{TEI_NS}origDate"
+ABBR_TAG = f"{TEI_NS}abbr"
+EXPAN_TAG = f"{TEI_NS}expan"
+LANG_ATTR = f"{TEI_NS}lang"
+CHOICE_TAG = f"{TEI_NS}choice"
+
+# Files submitted to the worker pool ahead of the conversion, per worker
+_FILES_IN_FLIGHT_PER_WORKER = 4
+
+# Attribute names accepted by lcpcli layers
+_ATTR_NAME_RE = re.compile(r"[a-z][a-zA-Z0-9_]+$")
+
+# Normalized name of each XML attribute name seen so far, None if rejected
+_ATTR_NAMES = {}
+
+# Annotated element names and the LCP layers they are stored in
+LAYER_NAMES = {
+    tag: tag.capitalize()
+    for tag in ("placeName", "persName", "orgName", "substitution")
+}
 
-def extract_metadata(root):
-    """Extract metadata from the TEI header."""
-    metadata = {}
+# Metadata keys whose document attribute name is not just the lowercased key
+METADATA_KEY_MAP = {"origDate_when": "origdate"}
 
-    # Extract title
-    title_elem = root.find(".//tei:titleStmt/tei:title", namespaces)
-    if title_elem is not None and title_elem.text:
-        metadata["title"] = remove_extra_spaces(title_elem.text.strip()).replace(
-            "\n", " "
-        )
+# Document attribute name of each metadata key seen so far
+_METADATA_ATTR_NAMES = {}
+
+# Clark notation tags of the annotated elements, mapped to their names
+ANNOTATED_TAGS = {f"{TEI_NS}{tag}": tag for tag in LAYER_NAMES}
 
-    # Extract editors
+
+def extract_metadata(root):
+    """Extract metadata from the TEI header in a single walk."""
+    title = None
     editors = []
-    for editor in root.findall(".//tei:titleStmt/tei:editor/tei:persName", namespaces):
-        if editor.text:
-            editors.append(editor.text.strip())
+    dates = {}
+    repositories = {}
+    orig_date = None
+
+    for elem in root.iter(
+        TITLE_TAG, PERS_NAME_TAG, DATE_TAG, REPOSITORY_TAG, ORIG_DATE_TAG
+    ):
+        parent = elem.getparent()
+        if parent is None:
+            continue
+        tag = elem.tag
+        parent_tag = parent.tag
+
+        # Title: the first titleStmt/title
+        if tag == TITLE_TAG:
+            if title is None and parent_tag == TITLE_STMT_TAG:
+                title = elem
+
+        # Editors: titleStmt/editor/persName
+        elif tag == PERS_NAME_TAG:
+            if parent_tag == EDITOR_TAG and elem.text:
+                grandparent = parent.getparent()
+                if grandparent is not None and grandparent.tag == TITLE_STMT_TAG:
+                    editors.append(elem.text.strip())
+
+        # Dates: publicationStmt/date
+        elif tag == DATE_TAG:
+            if parent_tag == PUBLICATION_STMT_TAG:
+                date_type = elem.get("type")
+                date_when = elem.get("when")
+                if date_type and date_when:
+                    dates[f"date_{date_type}"] = date_when
+
+        # Repository information: msIdentifier/repository
+        elif tag == REPOSITORY_TAG:
+            if parent_tag == MS_IDENTIFIER_TAG:
+                lang = elem.get(LANG_ATTR)
+                if elem.text and lang:
+                    repositories[f"repository_{lang}"] = elem.text.strip()
+
+        # Origination date: the first origin/origDate
+        elif orig_date is None and parent_tag == ORIGIN_TAG:
+            orig_date = elem
+
+    # Keep the key order of the former one-query-per-field extraction
+    metadata = {}
+    if title is not None and title.text:
+        metadata["title"] = remove_extra_spaces(title.text.strip()).replace("\n", " ")
     metadata["editors"] = editors
-
-    # Extract dates
-    for date in root.findall(".//tei:publicationStmt/tei:date", namespaces):
-        date_type = date.get("type")
-        date_when = date.get("when")
-        if date_type and date_when:
-            metadata[f"date_{date_type}"] = date_when
-
-    # Extract repository information
-    for repo in root.findall(".//tei:msIdentifier/tei:repository", namespaces):
-        lang = repo.get("{http://www.tei-c.org/ns/1.0}lang")
-        if repo.text and lang:
-            metadata[f"repository_{lang}"] = repo.text.strip()
-
-    # Extract origination date
-    orig_date = root.find(".//tei:origin/tei:origDate", namespaces)
+    metadata.update(dates)
+    metadata.update(repositories)
     if orig_date is not None:
         metadata["origDate_when"] = orig_date.get("when", "")
 
@@ -123,32 +161,53 @@ def get_element_text(elem):
     return text
 
 
+def body_len_at_least(elem, threshold=150):
+    """
+    Check whether the stripped text of an element reaches a minimum length.
+
+    Equivalent to len(get_element_text(elem).strip()) >= threshold, but the
+    text is never joined and counting stops as soon as the threshold is met.
+
+    Args:
+        elem: The element whose text is measured
+        threshold: Minimum number of characters
+
+    Returns:
+        bool: True if the stripped text has at least threshold characters
+    """
+    if elem is None:
+        return False
+    total = 0
+    for chunk in elem.itertext():
+        if not total:
+            # Leading whitespace would be stripped
+            chunk = chunk.lstrip()
+        # Trailing whitespace only counts once more text follows it
+        content_len = len(chunk.rstrip())
+        if content_len and total + content_len >= threshold:
+            return True
+        total += len(chunk)
+    return False
+
+
 def remove_extra_spaces(text):
     """Remove extra whitespaces from text."""
-    if not text:
-        return ""
-    return re.sub(r"\s+", " ", text).strip()
+    return _WS_RE.sub(" ", text).strip() if text else ""
 
 
 ### Consider using "current_pos" from one text to another to linearize them at this point correctly
 
 
-def extract_text_and_annotations(root, namespaces, current_pos=0):
+def extract_text_and_annotations(body, current_pos=0):
     """
     Extract the full text content and annotations from a TEI XML document.
 
     Args:
-        root: The XML root element
-        namespaces: Namespace dictionary for XML parsing
+        body: The <body> element containing the main text
 
     Returns:
         tuple: (text, annotations)
     """
-    # Find the body containing the main text
-    body = root.find(".//tei:body", namespaces)
-    if body is None:
-        return "", []
-
     # Initialize text and annotations lists
     text = []
     annotations = []
@@ -157,130 +216,220 @@ def extract_text_and_annotations(root, namespaces, current_pos=0):
     current_pos = current_pos
 
     # Process the document to extract text and annotations
-    position = process_element(body, text, annotations, current_pos, namespaces)
+    position = walk(body, text, annotations, current_pos)
 
     return " ".join(text), annotations, position
 
 
-def process_element(elem, text, annotations, position, namespaces):
+def normalize_attributes(attrib):
+    """
+    Normalize XML attribute names into valid LCP attribute names.
+
+    Args:
+        attrib: The attribute mapping of an element
+
+    Returns:
+        dict: Attributes keyed by normalized name, without names LCP would reject
+    """
+    attrs = {}
+    if not attrib:
+        return attrs
+    for key, value in attrib.items():
+        try:
+            name = _ATTR_NAMES[key]
+        except KeyError:
+            name = key.lower().replace("_", "").replace(" ", "")
+            if not _ATTR_NAME_RE.match(name):
+                log_message(
+                    f"Warning: Skipping annotation attribute '{name}' (from key "
+                    f"'{key}'): not a valid LCP attribute name"
+                )
+                name = None
+            _ATTR_NAMES[key] = name
+        if name is not None:
+            attrs[name] = value
+    return attrs
+
+
+def walk(body, text, annotations, position):
     """
-    Process an XML element to extract text and annotations recursively.
+    Walk the body of a document to extract text and annotations iteratively.
 
     Args:
-        elem: The current XML element
+        body: The <body> element of the document
         text: List to accumulate text (modified in-place)
         annotations: List to accumulate annotations (modified in-place)
         position: Current position in the text
-        namespaces: XML namespace dictionary
 
     Returns:
-        int: The new current position after processing this element
+        int: The new current position after processing the body
     """
-    start_pos = position
-
-    # Process element text (if any)
-    elem_text = elem.text
-    if elem_text:
-        elem_text = remove_extra_spaces(elem_text)
-        if elem_text:
-            text.append(elem_text)
-            position += len(elem_text) + 1
-    # Get element tag name without namespace
-    tag = elem.tag.split("}")[-1] if "}" in elem.tag else elem.tag
-
-    # Special handling for choice tags
-    if tag == "choice":
-        abbr = elem.find("./tei:abbr", namespaces)
-        expan = elem.find("./tei:expan", namespaces)
-
-        # Track the start position for this annotation
-        choice_start = position
-        # "default" values
-        abbr_text = ""
-        expanded_text = ""
-
-        # Use expanded text in the annotation
-        if abbr is not None:
-            abbr_text = remove_extra_spaces(get_element_text(abbr))
-
-        # Get expanded text for the annotation
-        if expan is not None:
-            expanded_text = remove_extra_spaces(get_element_text(expan))
-            text.append(expanded_text)
-            position += len(expanded_text) + 1
-
-        # Create the choice annotation
-        annotations.append(
-            {
-                "type": "choice",
-                "start_offset": choice_start,
-                "end_offset": position,
-                "text": text[-1] if text[-1:] else "",
-                "alternative_text": abbr_text,
-                "attributes": elem.attrib,
-            }
-        )
+    text_append = text.append
+    annotations_append = annotations.append
+    ws_sub = _WS_RE.sub
+
+    # Start positions of the elements being walked
+    start_positions = []
+    # Depth inside a <choice>, whose children are handled at its end event
+    choice_depth = 0
+
+    for event, elem in ET.iterwalk(body, events=("start", "end")):
+        if choice_depth:
+            choice_depth += 1 if event == "start" else -1
+            if choice_depth:
+                continue
 
-        # Skip processing children since we handled them directly
-        for child in elem:
-            child_tail = child.tail
-            child_tail = remove_extra_spaces(child_tail)
-            if child_tail:
-                text.append(child_tail)
-                position += len(child_tail) + 1
-        return position
+        if event == "start":
+            start_positions.append(position)
+
+            # Process element text (if any)
+            elem_text = elem.text
+            if elem_text:
+                elem_text = ws_sub(" ", elem_text).strip()
+                if elem_text:
+                    text_append(elem_text)
+                    position += len(elem_text) + 1
+
+            if elem.tag == CHOICE_TAG:
+                choice_depth = 1
+            continue
+
+        start_pos = start_positions.pop()
+        tag = elem.tag
+
+        # Special handling for choice tags
+        if tag == CHOICE_TAG:
+            # Pick the first <abbr> and <expan> children in a single pass
+            abbr = expan = None
+            for child in elem:
+                child_tag = child.tag
+                if child_tag == ABBR_TAG:
+                    if abbr is None:
+                        abbr = child
+                elif child_tag == EXPAN_TAG:
+                    if expan is None:
+                        expan = child
+
+            # Track the start position for this annotation
+            choice_start = position
+            # "default" values
+            abbr_text = ""
+            expanded_text = ""
+
+            # Use expanded text in the annotation
+            if abbr is not None:
+                abbr_text = remove_extra_spaces(get_element_text(abbr))
+
+            # Get expanded text for the annotation
+            if expan is not None:
+                expanded_text = remove_extra_spaces(get_element_text(expan))
+                text_append(expanded_text)
+                position += len(expanded_text) + 1
+
+            # Create the choice annotation
+            annotations_append(
+                {
+                    "type": "choice",
+                    "layer": "Choice",
+                    "start_offset": choice_start,
+                    "end_offset": position,
+                    "text": text[-1] if text else "",
+                    "alternative_text": abbr_text,
+                    "attributes": normalize_attributes(elem.attrib),
+                }
+            )
+
+            # Children were skipped by the walk, only their tails are kept
+            for child in elem:
+                child_tail = remove_extra_spaces(child.tail)
+                if child_tail:
+                    text_append(child_tail)
+                    position += len(child_tail) + 1
+
+        # Create annotation if this is one of the types we're looking for
+        elif tag in ANNOTATED_TAGS:
+            ann_type = ANNOTATED_TAGS[tag]
+            annotations_append(
+                {
+                    "type": ann_type,
+                    "layer": LAYER_NAMES[ann_type],
+                    "start_offset": start_pos,
+                    "end_offset": position,
+                    "text": text[-1] if text else "",
+                    "attributes": normalize_attributes(elem.attrib),
+                }
+            )
+
+        # Don't forget the tail text (text that follows the element)
+        elem_tail = elem.tail
+        if elem_tail and elem is not body:
+            elem_tail = ws_sub(" ", elem_tail).strip()
+            if elem_tail:
+                text_append(elem_tail)
+                position += len(elem_tail) + 1
 
-    # Process child elements
-    for child in elem:
-        position = process_element(child, text, annotations, position, namespaces)
-
-        # Don't forget the tail text (text that follows the child element)
-        child_tail = child.tail
-        child_tail = remove_extra_spaces(child_tail)
-        if child_tail:
-            text.append(child_tail)
-            position += len(child_tail) + 1
-
-    # Create annotation if this is one of the types we're looking for
-    if tag in ["placeName", "persName", "orgName", "substitution"]:
-        # Add this annotation to our list
-        annotation = {
-            "type": tag,
-            "start_offset": start_pos,
-            "end_offset": position,
-            "text": text[-1] if text[-1:] else "",
-            "attributes": elem.attrib,
-        }
-        annotations.append(annotation)
-    # print("Text is: ", text)
-    # print("Tag is: ", tag)
-    # input("...")
     return position
 
 
-def process_xml_file(file_path, namespaces, current_pos=0):
+# Handle on logger.txt, opened on first use in each process
+_LOG = None
+
+
+def log_message(message):
+    """Append a line to logger.txt, opening the file only once per process."""
+    global _LOG
+    if _LOG is None:
+        # Line buffered, so worker processes never lose lines on exit
+        _LOG = open("logger.txt", "a", buffering=1)
+    _LOG.write(message + "\n")
+
+
+def process_xml_file(file_path, current_pos=0):
     """
     Process a TEI XML file to extract metadata, text, and annotations.
 
     Args:
         file_path: Path to the XML file
-        namespaces: XML namespace dictionary
 
     Returns:
         dict: Document data with metadata, text, and annotations
     """
     try:
-        tree = ET.parse(file_path)
-        root = tree.getroot()
+        # Stream the file and only build the header and the body; comments and
+        # processing instructions are dropped, as ElementTree did
+        header = None
+        body = None
+        events = ET.iterparse(
+            file_path,
+            events=("end",),
+            tag=(HEADER_TAG, BODY_TAG),
+            remove_comments=True,
+            remove_pis=True,
+        )
+        for _, elem in events:
+            if elem.tag == HEADER_TAG:
+                if header is None:
+                    header = elem
+                else:
+                    elem.clear(keep_tail=True)
+            elif next(elem.iterancestors(BODY_TAG), None) is None:
+                # Bodies nested in the main one, e.g. in <floatingText>, end
+                # first but are part of it, as find(".//tei:body") did
+                body = elem
+                break
+
+        # Free what was parsed before the body inside <text>, e.g. <front>; the
+        # whole tree is only searched for metadata when there is no header
+        if body is not None and header is not None:
+            parent = body.getparent()
+            while body.getprevious() is not None:
+                del parent[0]
 
         # if <text> tag and its children don't contain any text, skip the doc
-        text_element = root.find(".//tei:body", namespaces)
-        text_element = get_element_text(text_element).strip()
-        if (not text_element) or (len(text_element) < 150):
-            with open("logger.txt", "a") as log_file:
-                log_file.write(
-                    f"Skipping document with no or little text content: {file_path}\n"
-                )
+        if not body_len_at_least(body, 150):
+            log_message(
+                f"Skipping document with no or little text content: {file_path}"
+            )
             return {
                 "file_path": file_path,
                 "metadata": {},
@@ -289,12 +438,15 @@ def process_xml_file(file_path, namespaces, current_pos=0):
             }, current_pos
 
         # Extract metadata
-        metadata = extract_metadata(root)
+        metadata = extract_metadata(header if header is not None else events.root)
+        if header is not None:
+            header.clear(keep_tail=True)
 
         # Extract text and annotations
         text, annotations, current_pos = extract_text_and_annotations(
-            root, namespaces, current_pos=current_pos
+            body, current_pos=current_pos
         )
+        body.clear(keep_tail=True)
 
         return {
             "file_path": file_path,
@@ -313,44 +465,98 @@ def process_xml_file(file_path, namespaces, current_pos=0):
         }, current_pos
 
 
+def process_corpus_file(job):
+    """
+    Process one XML file of the corpus in a worker process.
+
+    Args:
+        job: Tuple (subdir_name, xml_file)
+
+    Returns:
+        tuple: (doc_data, doc_length, subdir_name), or None if processing failed
+    """
+    subdir_name, xml_file = job
+    try:
+        doc_data, doc_length = process_xml_file(xml_file)
+        return doc_data, doc_length, subdir_name
+    except Exception as e:
+        # Log the error but continue with next file
+        print(f"Error processing {xml_file}: {e}")
+        log_message(f"Error processing {xml_file}: {str(e)}")
+        return None
+
+
 def process_corpus(xml_files_by_subdir):
     """
-    Process all XML files in the corpus.
+    Process all XML files in the corpus, one worker process per CPU.
 
     Args:
         xml_files_by_subdir: Dictionary mapping subdirectory names to lists of XML file paths
 
-    Returns:
-        dict: Corpus data organized by subdirectory
+    Yields:
+        tuple: (doc_data, subdir_name) in corpus order
     """
 
     # Create or empty the logger.txt file
     with open("logger.txt", "w") as f:
         f.write(f"Process started at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
 
-    corpus_data = []
+    jobs = [
+        (subdir_name, xml_file)
+        for subdir_name, xml_files in xml_files_by_subdir.items()
+        for xml_file in xml_files
+    ]
+
     current_pos = 0
-    for subdir_name, xml_files in xml_files_by_subdir.items():
-        print(f"Processing files from {subdir_name}...")
+    max_workers = os.cpu_count() or 1
+    job_iter = iter(jobs)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        # Only a sliding window of files is in flight, so parsed documents
+        # cannot pile up faster than the consumer converts them
+        pending = deque(
+            executor.submit(process_corpus_file, job)
+            for job in islice(job_iter, max_workers * _FILES_IN_FLIGHT_PER_WORKER)
+        )
+        try:
+            with tqdm(total=len(jobs), desc="Files", unit="file") as progress:
+                while pending:
+                    result = pending.popleft().result()
+                    for job in islice(job_iter, 1):
+                        pending.append(executor.submit(process_corpus_file, job))
+                    progress.update()
+                    if result is None:
+                        continue
+                    doc_data, doc_length, subdir_name = result
+
+                    # Documents are processed from position 0, rebase them on
+                    # the corpus
+                    for annotation in doc_data["annotations"]:
+                        annotation["start_offset"] += current_pos
+                        annotation["end_offset"] += current_pos
+                    current_pos += doc_length
+
+                    yield doc_data, subdir_name
+        finally:
+            # When the consumer stops early, drop the files not started yet
+            for future in pending:
+                future.cancel()
 
-        for xml_file in tqdm(xml_files, desc=f"{subdir_name}", unit="file"):
-            try:
-                doc_data, current_pos = process_xml_file(
-                    xml_file, namespaces, current_pos=current_pos
-                )
-                corpus_data.append((doc_data, subdir_name))
-            except Exception as e:
-                # Log the error but continue with next file
-                print(f"Error processing {xml_file}: {e}")
-                with open("logger.txt", "a") as log_file:
-                    log_file.write(f"Error processing {xml_file}: {str(e)}\n")
 
-    return corpus_data
+##################################################################
 
+_PUNKT_READY = False
 
-corpus_data = process_corpus(xml_files_by_subdir)
 
-##################################################################
+def _ensure_punkt():
+    """Download the NLTK Punkt model if needed, checking only once."""
+    global _PUNKT_READY
+    if _PUNKT_READY:
+        return
+    try:
+        nltk.data.find("tokenizers/punkt")
+    except LookupError:
+        nltk.download("punkt", quiet=True)
+    _PUNKT_READY = True
 
 
 def convert_to_lcp(corpus_data, output_folder="output"):
@@ -358,19 +564,27 @@ def convert_to_lcp(corpus_data, output_folder="output"):
     Convert corpus data to LCP format using lcpcli.builder.
 
     Args:
-        corpus_data: List of tuples containing (doc_data, subdir_name)
+        corpus_data: Iterable of tuples containing (doc_data, subdir_name)
         output_folder: Path to save the LCP corpus
 
     Returns:
         The created corpus object
     """
-    corpus_data = corpus_data[:1000].copy()  # for testing purposes
+    # Number of documents to convert, for testing purposes; 0 converts all
+    limit = int(os.environ.get("SSRQ_LIMIT", "1000"))
+    if limit:
+        corpus_data = islice(corpus_data, limit)
 
     # Ensure NLTK resources are available for tokenization
-    try:
-        nltk.data.find("tokenizers/punkt")
-    except LookupError:
-        nltk.download("punkt", quiet=True)
+    _ensure_punkt()
+
+    # Load the tokenizers once instead of on every sent_tokenize/word_tokenize call
+    sent_tokenize = nltk.data.load("tokenizers/punkt/english.pickle").tokenize
+    if USE_NLTK_WORD_TOKENIZER:
+        # Tokenizer used by nltk.word_tokenize, applied directly to each sentence
+        word_tokenize = nltk.tokenize.NLTKWordTokenizer().tokenize
+    else:
+        word_tokenize = _WORD_RE.findall
 
     # Prepare output directory
     if not os.path.exists(output_folder):
@@ -404,9 +618,9 @@ def convert_to_lcp(corpus_data, output_folder="output"):
         annotations = doc_data.get("annotations", [])
 
         document_sentences = []
-        for sentence_text in nltk.sent_tokenize(doc_text):
+        for sentence_text in sent_tokenize(doc_text):
             sentence_words = []
-            for word_form in nltk.word_tokenize(sentence_text):
+            for word_form in word_tokenize(sentence_text):
                 word_obj = corpus.Word(word_form)
                 # word_obj.make()
                 sentence_words.append(word_obj)
@@ -418,9 +632,12 @@ def convert_to_lcp(corpus_data, output_folder="output"):
         doc_obj = corpus.Document(*document_sentences, title=doc_title)
 
         for key, value in metadata.items():
-            if key == "origDate_when":
-                key = "origdate"  # Normalize key for origDate
-            attr_name = key.lower()
+            try:
+                attr_name = _METADATA_ATTR_NAMES[key]
+            except KeyError:
+                attr_name = _METADATA_ATTR_NAMES[key] = METADATA_KEY_MAP.get(
+                    key, key.lower()
+                )
             if attr_name and isinstance(value, (str, int, float, bool, list)):
                 try:
                     setattr(doc_obj, attr_name, value)
@@ -438,22 +655,11 @@ def convert_to_lcp(corpus_data, output_folder="output"):
             end_offset = annotation["end_offset"]
             ann_text = annotation.get("text", "")
 
-            layer_name_str = ann_type.capitalize()
-            if not layer_name_str:
-                print(
-                    f"Warning: Could not derive valid layer name from type '{ann_type}'. Skipping annotation."
-                )
-                continue
+            layer_name_str = annotation["layer"]
 
-            try:
-                AnnotationLayerFactory = getattr(corpus, layer_name_str)
-            except AttributeError:
-                print(
-                    f"Warning: LCP Layer factory for '{layer_name_str}' (from type '{ann_type}') not found. Skipping annotation: {annotation}"
-                )
-                continue
-
-            ann_instance = AnnotationLayerFactory()
+            # Corpus creates the layer on attribute access and every call of the
+            # returned factory yields that same instance, so it cannot be cached
+            ann_instance = getattr(corpus, layer_name_str)()
 
             if ann_type == "choice" and "alternative_text" in annotation:
                 alt_text = annotation["alternative_text"]
@@ -467,15 +673,9 @@ def convert_to_lcp(corpus_data, output_folder="output"):
                 # For other types, we can set the text directly
                 ann_instance.text = ann_text
 
+            # Keys were normalized to valid attribute names during extraction
             for attr_key, attr_value in annotation.get("attributes", {}).items():
-                safe_attr_key = attr_key.lower().replace("_", "").replace(" ", "")
-                if safe_attr_key:
-                    try:
-                        setattr(ann_instance, safe_attr_key, attr_value)
-                    except AssertionError as e:
-                        print(
-                            f"Warning: Could not set annotation attribute '{safe_attr_key}' (from key '{attr_key}') on layer {layer_name_str}: {e}"
-                        )
+                setattr(ann_instance, attr_key, attr_value)
 
             ann_instance.set_char(start_offset, end_offset)
             ann_instance.make()
@@ -484,11 +684,101 @@ def convert_to_lcp(corpus_data, output_folder="output"):
     print(f"Corpus successfully converted and saved to {output_folder}")
 
 
-convert_to_lcp(corpus_data, output_folder="output")
+# Checker of the current check_output worker process
+_CHECKER = None
+
+
+def _init_checker(conf):
+    """
+    Create the Checker of a check_output worker process.
+
+    Checker.__init__ also raises the csv field size limit, which is per process,
+    so it must run in every worker rather than be unpickled there.
+    """
+    from lcpcli.check_files import Checker
+
+    global _CHECKER
+    _CHECKER = Checker(conf)
+
+
+def _check_file(filename, output_folder):
+    """Check the rows of one output file in a check_output worker process."""
+    _CHECKER.check_existing_file(filename, output_folder)
+
+
+def check_output(output_folder="output"):
+    """
+    Validate the converted corpus with lcpcli's Checker.
+
+    The configuration and file headers are checked first, then the rows of
+    every output file are checked in parallel, one file per worker process.
+
+    Args:
+        output_folder: Path of the LCP corpus
+    """
+    from lcpcli.check_files import Checker, EXTENSIONS
+
+    with open(os.path.join(output_folder, "config.json"), "r") as config_file:
+        conf = json.load(config_file)
+    checker = Checker(conf)
+    checker.run_checks(output_folder, full=False, add_zero=False)
+
+    filenames = [f for f in os.listdir(output_folder) if f.endswith(EXTENSIONS)]
+    with ProcessPoolExecutor(
+        max_workers=os.cpu_count(), initializer=_init_checker, initargs=(conf,)
+    ) as executor:
+        futures = [
+            executor.submit(_check_file, filename, output_folder)
+            for filename in filenames
+        ]
+        for filename, future in zip(filenames, futures):
+            future.result()  # Re-raises the failed check, if any
+            print(f"Checked file {filename}")
+
+
+def main():
+    """Find the SSRQ corpus files, convert them to LCP format and check the output."""
+    if not path.exists("output"):
+        mkdir("output")
+
+    # Find directory starting with "SSRQ" and containing a "data" subfolder
+    dir = None
+    for entry in iter_subdirs(os.getcwd()):
+        if entry.name.startswith("SSRQ"):
+            potential_data_path = os.path.join(entry.path, "data")
+            if os.path.isdir(potential_data_path):
+                dir = potential_data_path
+                break
+
+    if not dir:
+        raise FileNotFoundError(
+            "Could not find a directory starting with 'SSRQ' containing a 'data' subfolder"
+        )
+
+    # Dictionary to store XML files for each subdirectory
+    xml_files_by_subdir = {}
+
+    # Loop through each subdirectory
+    for subdir in iter_subdirs(dir):
+        xml_files = xml_files_by_subdir[subdir.name] = []
+
+        # Look for XML files in the folders within this subdirectory
+        for inner_folder in iter_subdirs(subdir.path):
+            with os.scandir(inner_folder.path) as it:
+                for file in it:
+                    name = file.name
+                    if "-lit" in name or "-intro" in name:
+                        continue
+                    if name.endswith(".xml"):
+                        xml_files.append(file.path)
+
+    # Closing the generator shuts the worker pool down even when the
+    # conversion stops before the last document
+    with closing(process_corpus(xml_files_by_subdir)) as corpus_data:
+        convert_to_lcp(corpus_data, output_folder="output")
+
+    check_output("output")
 
-from lcpcli.check_files import Checker
 
-output_folder = "output"
-conf = json.loads(open("output/config.json", "r").read())
-checker = Checker(conf)
-checker.run_checks(output_folder, full=True, add_zero=False)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Golden-output regression test of convert.py on a small TEI fixture corpus."""
+
+import os
+import re
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import convert  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+DATA_DIR = os.path.join(FIXTURES, "data")
+EXPECTED_DIR = os.path.join(FIXTURES, "expected")
+
+_UUID_RE = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+
+
+def fixture_files():
+    """Map each canton of the fixture corpus to its sorted XML files."""
+    xml_files_by_subdir = {}
+    for canton in sorted(os.listdir(DATA_DIR)):
+        canton_dir = os.path.join(DATA_DIR, canton)
+        xml_files_by_subdir[canton] = sorted(
+            os.path.join(canton_dir, folder, name)
+            for folder in os.listdir(canton_dir)
+            for name in os.listdir(os.path.join(canton_dir, folder))
+            if name.endswith(".xml")
+        )
+    return xml_files_by_subdir
+
+
+def read_output(directory):
+    """
+    Read the CSV files of a converted corpus.
+
+    Segment IDs are random, so every UUID is replaced by its rank of first
+    appearance across the files, which keeps the links between files.
+    """
+    uuids = {}
+
+    def number_uuid(match):
+        return "uuid-%d" % uuids.setdefault(match.group(0), len(uuids) + 1)
+
+    files = {}
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".csv"):
+            with open(os.path.join(directory, name), encoding="utf-8") as f:
+                files[name] = _UUID_RE.sub(number_uuid, f.read())
+    return files
+
+
+def test_fixture_corpus_matches_expected_output(tmp_path):
+    corpus_data = convert.process_corpus(fixture_files())
+    convert.convert_to_lcp(corpus_data, output_dir=str(tmp_path))
+
+    actual = read_output(tmp_path)
+    expected = read_output(EXPECTED_DIR)
+
+    assert sorted(actual) == sorted(expected)
+    for name in expected:
+        assert actual[name] == expected[name], f"{name} differs"
+
+
+@pytest.mark.parametrize(
+    "xml, text",
+    [
+        # Nested text is stripped level by level
+        ("<p><hi> Hans </hi>Bern</p>", "HansBern"),
+        # Nested deleted text is skipped
+        ("<p>Uli <del>Meyer</del> Müller</p>", "Uli Müller"),
+        # The text of a <del> element itself is kept
+        ("<del>Meyer</del>", "Meyer"),
+        ("<p>  a \n\n b  </p>", "a b"),
+    ],
+)
+def test_get_element_text(xml, text):
+    # Put the element in the TEI namespace, which its children inherit
+    xml = xml.replace(">", ' xmlns="http://www.tei-c.org/ns/1.0">', 1)
+    assert convert.get_element_text(convert.ET.fromstring(xml)) == text
@@ -0,0 +1,170 @@
+"""Regression tests of the TEI extraction in convert_builder.py."""
+
+import json
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import convert_builder  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+DATA_DIR = os.path.join(FIXTURES, "data")
+EXPECTED_DOCUMENTS = os.path.join(FIXTURES, "builder_documents.json")
+
+TEI = 'xmlns="http://www.tei-c.org/ns/1.0"'
+
+
+def fixture_files():
+    """Map each canton of the fixture corpus to its sorted XML files."""
+    xml_files_by_subdir = {}
+    for canton in sorted(os.listdir(DATA_DIR)):
+        canton_dir = os.path.join(DATA_DIR, canton)
+        xml_files_by_subdir[canton] = sorted(
+            os.path.join(canton_dir, folder, name)
+            for folder in os.listdir(canton_dir)
+            for name in os.listdir(os.path.join(canton_dir, folder))
+            if name.endswith(".xml")
+        )
+    return xml_files_by_subdir
+
+
+def process_sequentially(xml_files_by_subdir):
+    """Process the files one after the other, passing the position along."""
+    results = []
+    current_pos = 0
+    for subdir_name, xml_files in xml_files_by_subdir.items():
+        for xml_file in xml_files:
+            doc_data, current_pos = convert_builder.process_xml_file(
+                xml_file, current_pos=current_pos
+            )
+            results.append((doc_data, subdir_name, current_pos))
+    return results
+
+
+@pytest.fixture(autouse=True)
+def log_to_tmp_path(tmp_path, monkeypatch):
+    """Write logger.txt to a temporary directory."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(convert_builder, "_LOG", None)
+
+
+def test_process_xml_file_matches_expected_documents():
+    with open(EXPECTED_DOCUMENTS, encoding="utf-8") as f:
+        expected = json.load(f)
+
+    xml_files = [f for files in fixture_files().values() for f in files]
+    actual = []
+    for doc_data, _, position in process_sequentially(fixture_files()):
+        doc_data = dict(doc_data, file_path=os.path.basename(doc_data["file_path"]))
+        actual.append({"document": doc_data, "position": position})
+
+    assert len(actual) == len(xml_files) == len(expected)
+    for actual_doc, expected_doc in zip(actual, expected):
+        assert actual_doc == expected_doc, actual_doc["document"]["file_path"]
+
+
+@pytest.mark.parametrize(
+    "text, threshold, expected",
+    [
+        ("x" * 149, 150, False),
+        ("x" * 150, 150, True),
+        ("x" * 151, 150, True),
+        # Leading and trailing whitespace does not count
+        ("   " + "x" * 149 + "   ", 150, False),
+        ("\n\t" + "x" * 150 + "\n", 150, True),
+        # Inner whitespace does
+        ("x" * 74 + "  " + "x" * 74, 150, True),
+        ("x" * 74 + " " + "x" * 74, 150, False),
+        ("", 150, False),
+        ("   ", 1, False),
+    ],
+)
+def test_body_len_at_least(text, threshold, expected):
+    body = convert_builder.ET.fromstring(f"<body {TEI}><p>{text}</p></body>")
+    assert convert_builder.body_len_at_least(body, threshold) is expected
+
+
+@pytest.mark.parametrize(
+    "xml, threshold, expected",
+    [
+        # Text is counted across elements, tails included
+        ("<p>  abc <hi> de </hi>f  </p>", 9, True),
+        ("<p>  abc <hi> de </hi>f  </p>", 10, False),
+        # Whitespace only between the chunks still counts
+        ("<p><hi>ab</hi>   <hi>cd</hi></p>", 7, True),
+        ("<p><hi>ab</hi>   <hi>  </hi></p>", 3, False),
+    ],
+)
+def test_body_len_at_least_across_elements(xml, threshold, expected):
+    body = convert_builder.ET.fromstring(f"<body {TEI}>{xml}</body>")
+    assert convert_builder.body_len_at_least(body, threshold) is expected
+    stripped = convert_builder.get_element_text(body).strip()
+    assert (len(stripped) >= threshold) is expected
+
+
+def test_body_len_at_least_without_body():
+    assert convert_builder.body_len_at_least(None) is False
+
+
+def test_normalize_attributes():
+    element = convert_builder.ET.fromstring(
+        f'<persName {TEI} ref="per1" dur_iso="P1D" xml:id="n1"/>'
+    )
+    assert convert_builder.normalize_attributes(element.attrib) == {
+        "ref": "per1",
+        "duriso": "P1D",
+    }
+
+
+def test_process_xml_file_uses_outermost_body():
+    # The nested <body> inside <floatingText> closes first, but its text is part
+    # of the main body, which is the one that is converted
+    doc_data, position = convert_builder.process_xml_file(
+        os.path.join(FIXTURES, "nested_body.xml"), current_pos=10
+    )
+
+    assert doc_data["metadata"] == {
+        "title": "Urkunde mit eingebettetem Text",
+        "editors": [],
+    }
+    assert doc_data["text"] == (
+        "Wir Hans Keller , schultheiss ze Baden , tůnd kund allen, die disen brief "
+        "ansehent oder hörent lesen, das für uns kam Inner und offnet, wie er mit "
+        "dem rat überkomen sye, das er den zechenden järlich uff sant Martins tag "
+        "ussrichten sölle."
+    )
+    assert [
+        (a["type"], a["start_offset"], a["end_offset"], a["text"], a["attributes"])
+        for a in doc_data["annotations"]
+    ] == [
+        ("persName", 14, 26, "Hans Keller", {"ref": "per000001"}),
+        ("placeName", 43, 49, "Baden", {"ref": "loc000001"}),
+        ("orgName", 157, 165, "dem rat", {"ref": "org000001"}),
+    ]
+    assert position == 248
+
+
+def test_process_corpus_matches_sequential_processing(tmp_path):
+    xml_files_by_subdir = fixture_files()
+    # A malformed file is reported as an empty document that adds no text
+    broken_file = tmp_path / "broken.xml"
+    broken_file.write_text("<TEI><text><body><p>unclosed</body></TEI>")
+    xml_files_by_subdir["XX"] = [
+        os.path.join(FIXTURES, "nested_body.xml"),
+        str(broken_file),
+        os.path.join(FIXTURES, "nested_body.xml"),
+    ]
+
+    expected = [
+        (doc_data, subdir_name)
+        for doc_data, subdir_name, _ in process_sequentially(xml_files_by_subdir)
+    ]
+    actual = list(convert_builder.process_corpus(xml_files_by_subdir))
+
+    # Same documents in corpus order, with offsets rebased on the whole corpus
+    assert actual == expected
+    assert actual[-1][0]["annotations"][0]["start_offset"] > 0